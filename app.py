@@ -230,8 +230,8 @@ with col1:
     camera_input = st.camera_input("Camera", label_visibility="collapsed")
     
     if camera_input is not None:
-        # Convert PIL Image to numpy array
-        frame = np.array(camera_input)
+        # Decode the uploaded snapshot into a numpy array
+        frame = np.array(Image.open(camera_input).convert("RGB"))
         frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
         
         # Get actual frame dimensions (mobile cameras vary)
@@ -371,7 +371,7 @@ if col2 is not None:
         if st.button("Clear Canvas", type="primary", use_container_width=True):
             # Get current frame size for canvas
             if camera_input is not None:
-                frame_temp = np.array(camera_input)
+                frame_temp = np.array(Image.open(camera_input))
                 h, w = frame_temp.shape[:2]
                 st.session_state.canvas = np.zeros((h, w, 3), np.uint8)
             else:
@@ -425,7 +425,7 @@ else:
     
     if st.button("🗑️ Clear Canvas", type="primary", use_container_width=True):
         if camera_input is not None:
-            frame_temp = np.array(camera_input)
+            frame_temp = np.array(Image.open(camera_input))
             h, w = frame_temp.shape[:2]
             st.session_state.canvas = np.zeros((h, w, 3), np.uint8)
         else:
@@ -0,0 +1,591 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from http.cookies import SimpleCookie
+
+import cv2
+import numpy as np
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError, HTTPRequest
+from tornado.websocket import websocket_connect
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.Common_pb2 import UploadedFileInfo
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# ------------ Config ------------
+XSRF_COOKIE = "_streamlit_xsrf"
+STREAM_ENDPOINT = "/_stcore/stream"
+HEALTH_ENDPOINT = "/_stcore/health"
+
+wCam, hCam = 640, 480  # same default frame size as app.py
+max_source_frames = 120  # frames pre-encoded from a recorded source
+sample_interval = 0.5  # seconds between server CPU / RSS samples
+
+
+# ------------ Frame sources ------------
+def synthetic_frames(count, width, height):
+    # Moving bright blob over noise so every frame is a distinct JPEG
+    rng = np.random.default_rng(0)
+    frames = []
+    for i in range(count):
+        img = rng.integers(0, 60, (height, width, 3), dtype=np.uint8)
+        x = int((0.5 + 0.4 * np.sin(i / 8)) * width)
+        y = int((0.5 + 0.4 * np.cos(i / 11)) * height)
+        cv2.circle(img, (x, y), height // 10, (200, 180, 160), cv2.FILLED)
+        frames.append(img)
+    return frames
+
+
+def recorded_frames(path, limit):
+    if os.path.isdir(path):
+        frames = []
+        for name in sorted(os.listdir(path)):
+            img = cv2.imread(os.path.join(path, name))
+            if img is not None:
+                frames.append(img)
+            if len(frames) >= limit:
+                break
+        return frames
+
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < limit:
+        success, frame = cap.read()
+        if not success:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def load_frames(source, width, height):
+    if source is None:
+        frames = synthetic_frames(max_source_frames, width, height)
+    else:
+        frames = recorded_frames(source, max_source_frames)
+    if not frames:
+        raise SystemExit(f"No frames could be read from {source}")
+
+    # Encode once up front; st.camera_input uploads JPEG snapshots
+    encoded = []
+    for frame in frames:
+        ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        if ok:
+            encoded.append(buf.tobytes())
+    return encoded
+
+
+# ------------ Simulated camera client ------------
+class SessionStats:
+    def __init__(self):
+        self.latencies = []
+        self.frames = 0
+        self.errors = {}
+
+    def error(self, kind):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+
+class CameraClient:
+    """One browser tab: a websocket session that keeps submitting camera snapshots."""
+
+    def __init__(self, base_url, frames, fps, timeout, fetch_images):
+        self.base_url = base_url.rstrip("/")
+        self.frames = frames
+        self.fps = fps
+        self.timeout = timeout
+        self.fetch_images = fetch_images
+        self.http = AsyncHTTPClient()
+        self.stats = SessionStats()
+
+        self.ws = None
+        self.headers = {}
+        self.session_id = None
+        self.page_script_hash = ""
+        self.camera_widget_id = None
+        self.prev_delete_url = None
+        self.request_count = 0
+
+    async def connect(self):
+        # The app is served with XSRF protection on, so uploads need the cookie;
+        # the health endpoint hands it out just like it does for the browser
+        resp = await self.http.fetch(self.base_url + HEALTH_ENDPOINT, request_timeout=self.timeout)
+        cookie = SimpleCookie()
+        for header in resp.headers.get_list("Set-Cookie"):
+            cookie.load(header)
+        if XSRF_COOKIE in cookie:
+            token = cookie[XSRF_COOKIE].value
+            self.headers = {
+                "Cookie": f"{XSRF_COOKIE}={token}",
+                "X-Xsrftoken": token,
+            }
+
+        ws_url = self.base_url.replace("http", "ws", 1) + STREAM_ENDPOINT
+        self.ws = await websocket_connect(
+            HTTPRequest(ws_url, headers=self.headers, request_timeout=self.timeout),
+            subprotocols=["streamlit"],
+            max_message_size=200 * 1024 * 1024,
+        )
+
+        # First page load: a plain rerun, which also tells us the camera widget id
+        await self.rerun(None)
+        if self.camera_widget_id is None:
+            raise RuntimeError("camera_input widget not found in app output")
+
+    async def send(self, back_msg):
+        await self.ws.write_message(back_msg.SerializeToString(), binary=True)
+
+    async def recv(self, deadline):
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            raise asyncio.TimeoutError
+        data = await asyncio.wait_for(self.ws.read_message(), remaining)
+        if data is None:
+            raise ConnectionError("websocket closed by server")
+        msg = ForwardMsg()
+        msg.ParseFromString(data)
+        return msg
+
+    async def rerun(self, file_info):
+        back_msg = BackMsg()
+        back_msg.rerun_script.page_script_hash = self.page_script_hash
+        if file_info is not None:
+            state = back_msg.rerun_script.widget_states.widgets.add()
+            state.id = self.camera_widget_id
+            state.file_uploader_state_value.uploaded_file_info.append(file_info)
+        await self.send(back_msg)
+
+        # Read until the script run finishes, noting errors and rendered images
+        deadline = time.perf_counter() + self.timeout
+        image_urls = []
+        app_error = None
+        while True:
+            msg = await self.recv(deadline)
+            kind = msg.WhichOneof("type")
+
+            if kind == "new_session":
+                self.session_id = msg.new_session.initialize.session_id
+                self.page_script_hash = msg.new_session.main_script_hash
+            elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                element = msg.delta.new_element
+                element_type = element.WhichOneof("type")
+                if element_type == "camera_input":
+                    self.camera_widget_id = element.camera_input.id
+                elif element_type == "imgs":
+                    image_urls.extend(img.url for img in element.imgs.imgs)
+                elif element_type == "exception":
+                    app_error = element.exception.type
+            elif kind == "script_finished":
+                break
+
+        return image_urls, app_error
+
+    async def upload(self, data):
+        self.request_count += 1
+        request_id = str(self.request_count)
+        back_msg = BackMsg()
+        back_msg.file_urls_request.request_id = request_id
+        back_msg.file_urls_request.session_id = self.session_id
+        back_msg.file_urls_request.file_names.append("image.jpg")
+        await self.send(back_msg)
+
+        deadline = time.perf_counter() + self.timeout
+        while True:
+            msg = await self.recv(deadline)
+            if (msg.WhichOneof("type") == "file_urls_response"
+                    and msg.file_urls_response.response_id == request_id):
+                break
+        if msg.file_urls_response.error_msg:
+            raise RuntimeError(msg.file_urls_response.error_msg)
+        file_urls = msg.file_urls_response.file_urls[0]
+
+        boundary = uuid.uuid4().hex
+        body = (
+            f"--{boundary}\r\n"
+            'Content-Disposition: form-data; name="file"; filename="image.jpg"\r\n'
+            "Content-Type: image/jpeg\r\n\r\n"
+        ).encode() + data + f"\r\n--{boundary}--\r\n".encode()
+        headers = dict(self.headers)
+        headers["Content-Type"] = f"multipart/form-data; boundary={boundary}"
+        await self.http.fetch(
+            self.absolute(file_urls.upload_url), method="PUT", body=body,
+            headers=headers, request_timeout=self.timeout
+        )
+
+        # The browser deletes the previous snapshot once it is replaced
+        if self.prev_delete_url is not None:
+            await self.http.fetch(
+                self.absolute(self.prev_delete_url), method="DELETE",
+                headers=self.headers, request_timeout=self.timeout
+            )
+        self.prev_delete_url = file_urls.delete_url
+
+        return file_urls
+
+    def absolute(self, url):
+        return url if url.startswith("http") else self.base_url + url
+
+    async def send_frame(self, data):
+        file_urls = await self.upload(data)
+
+        file_info = UploadedFileInfo(
+            file_id=file_urls.file_id, name="image.jpg", size=len(data)
+        )
+        file_info.file_urls.CopyFrom(file_urls)
+
+        image_urls, app_error = await self.rerun(file_info)
+        if self.fetch_images:
+            for url in image_urls:
+                await self.http.fetch(self.absolute(url), request_timeout=self.timeout)
+        return app_error
+
+    async def run(self, duration, start_delay):
+        await asyncio.sleep(start_delay)
+        try:
+            await self.connect()
+        except Exception as e:
+            self.stats.error(f"connect: {type(e).__name__}: {e}")
+            return self.stats
+
+        period = 1.0 / self.fps
+        end = time.perf_counter() + duration
+        next_tick = time.perf_counter()
+        i = 0
+        while time.perf_counter() < end:
+            data = self.frames[i % len(self.frames)]
+            i += 1
+            t0 = time.perf_counter()
+            try:
+                app_error = await self.send_frame(data)
+            except asyncio.TimeoutError:
+                self.stats.error("timeout")
+                break
+            except HTTPClientError as e:
+                self.stats.error(f"http {e.code}")
+            except Exception as e:
+                self.stats.error(f"{type(e).__name__}")
+                break
+            else:
+                if app_error:
+                    self.stats.error(f"app {app_error}")
+                else:
+                    self.stats.latencies.append(time.perf_counter() - t0)
+                    self.stats.frames += 1
+
+            # Fixed-rate schedule; a slow server simply drops the client below target fps
+            next_tick += period
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                next_tick = time.perf_counter()
+
+        self.ws.close()
+        return self.stats
+
+
+# ------------ Server under test ------------
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(app_path, port):
+    cmd = [
+        sys.executable, "-m", "streamlit", "run", app_path,
+        "--server.headless", "true",
+        "--server.port", str(port),
+        "--browser.gatherUsageStats", "false",
+    ]
+    # Run from the app's folder so .streamlit/config.toml applies as in production
+    return subprocess.Popen(
+        cmd, cwd=os.path.dirname(os.path.abspath(app_path)),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+async def wait_for_health(base_url, timeout):
+    http = AsyncHTTPClient()
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            await http.fetch(base_url + HEALTH_ENDPOINT, request_timeout=2)
+            return
+        except Exception:
+            await asyncio.sleep(0.5)
+    raise SystemExit(f"Server at {base_url} did not become healthy in {timeout}s")
+
+
+class ResourceSampler:
+    """Samples CPU and RSS of the server process (and its children) while a level runs."""
+
+    def __init__(self, pid):
+        self.proc = psutil.Process(pid) if (psutil and pid) else None
+        self._children = {}  # pid -> Process, so cpu_percent has a previous reading
+        self.cpu = []
+        self.rss = []
+        self._task = None
+
+    def processes(self):
+        children = {}
+        for child in self.proc.children(recursive=True):
+            children[child.pid] = self._children.get(child.pid, child)
+        self._children = children
+        return [self.proc] + list(children.values())
+
+    def sample(self):
+        # None once the server is gone, so a crash doesn't read as 0 MB
+        try:
+            procs = self.processes()
+        except psutil.NoSuchProcess:
+            return None
+        cpu, rss = 0.0, 0
+        for p in procs:
+            try:
+                cpu += p.cpu_percent(None)
+                rss += p.memory_info().rss
+            except psutil.NoSuchProcess:
+                pass
+        return (cpu, rss) if rss else None
+
+    def record(self, with_cpu):
+        sample = self.sample()
+        if sample is not None:
+            if with_cpu:
+                self.cpu.append(sample[0])
+            self.rss.append(sample[1])
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(sample_interval)
+            self.record(True)
+
+    def start(self):
+        if self.proc is None:
+            return
+        self.record(False)  # also primes the cpu_percent counters
+        self._task = asyncio.ensure_future(self._loop())
+
+    def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        self.record(False)
+
+
+# ------------ Load levels ------------
+async def run_level(args, base_url, frames, users):
+    clients = [
+        CameraClient(base_url, frames, args.fps, args.timeout, not args.no_images)
+        for _ in range(users)
+    ]
+    sampler = ResourceSampler(args.server_pid)
+    sampler.start()
+
+    # Stagger session starts across the ramp so connects don't all land at once
+    ramp_step = args.ramp / users
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*[
+        c.run(args.duration, i * ramp_step) for i, c in enumerate(clients)
+    ])
+    elapsed = time.perf_counter() - t0
+    sampler.stop()
+
+    return summarize(args, users, results, elapsed, sampler)
+
+
+def summarize(args, users, results, elapsed, sampler):
+    latencies = np.array([l for s in results for l in s.latencies]) * 1000
+    frames = sum(s.frames for s in results)
+    errors = {}
+    for s in results:
+        for kind, n in s.errors.items():
+            errors[kind] = errors.get(kind, 0) + n
+    error_count = sum(errors.values())
+
+    def pct(q):
+        return float(np.percentile(latencies, q)) if len(latencies) else None
+
+    summary = {
+        "users": users,
+        "target_fps": args.fps,
+        "frames": frames,
+        "throughput_fps": frames / elapsed if elapsed > 0 else 0.0,
+        "session_fps": frames / users / args.duration,
+        "latency_ms": {
+            "p50": pct(50), "p95": pct(95), "p99": pct(99),
+            "max": float(latencies.max()) if len(latencies) else None,
+        },
+        "error_rate": error_count / max(1, frames + error_count),
+        "errors": errors,
+        "cpu_percent": None,
+        "rss_mb": None,
+    }
+    if sampler.rss:
+        mb = 1024 * 1024
+        summary["cpu_percent"] = {
+            "mean": float(np.mean(sampler.cpu)) if sampler.cpu else 0.0,
+            "max": float(np.max(sampler.cpu)) if sampler.cpu else 0.0,
+        }
+        summary["rss_mb"] = {
+            "start": sampler.rss[0] / mb,
+            "end": sampler.rss[-1] / mb,
+            "peak": max(sampler.rss) / mb,
+            # Peak, not end: sessions have already disconnected by the last sample
+            "growth_per_session": (max(sampler.rss) - sampler.rss[0]) / mb / users,
+        }
+
+    p95 = summary["latency_ms"]["p95"]
+    summary["ok"] = (
+        frames > 0
+        and summary["error_rate"] <= args.max_error_rate
+        and p95 is not None and p95 <= args.latency_budget
+        and summary["session_fps"] >= 0.9 * args.fps
+    )
+    return summary
+
+
+def fmt(value, spec=".0f"):
+    return "-" if value is None else format(value, spec)
+
+
+def print_report(levels, args):
+    print()
+    print(f"Capacity report  (target {args.fps:g} fps/session, "
+          f"p95 budget {args.latency_budget:g} ms, max error rate {args.max_error_rate:.1%})")
+    header = (f"{'users':>5} {'fps/sess':>8} {'total':>7} {'p50':>6} {'p95':>6} {'p99':>6} "
+              f"{'err':>6} {'cpu%':>6} {'rss MB':>8} {'MB/sess':>8}  ok")
+    print(header)
+    print("-" * len(header))
+    for s in levels:
+        lat = s["latency_ms"]
+        cpu = s["cpu_percent"] or {}
+        rss = s["rss_mb"] or {}
+        print(
+            f"{s['users']:>5} {s['session_fps']:>8.2f} {s['throughput_fps']:>7.1f} "
+            f"{fmt(lat['p50']):>6} {fmt(lat['p95']):>6} {fmt(lat['p99']):>6} "
+            f"{s['error_rate']:>6.1%} {fmt(cpu.get('mean')):>6} "
+            f"{fmt(rss.get('end'), '.1f'):>8} {fmt(rss.get('growth_per_session'), '.2f'):>8}  "
+            f"{'yes' if s['ok'] else 'NO'}"
+        )
+        if s["errors"]:
+            print(f"{'':>5} errors: " + ", ".join(f"{k}={v}" for k, v in s["errors"].items()))
+
+    passing = [s["users"] for s in levels if s["ok"]]
+    print()
+    if passing:
+        print(f"Max sustainable sessions per instance: {max(passing)}")
+    else:
+        print("No tested level met the targets.")
+    if levels and levels[0]["rss_mb"] is None:
+        print("(install psutil or pass --server-pid to collect server CPU / RSS)")
+
+
+# ------------ Main ------------
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Load-test the Streamlit air-draw app with simulated camera clients."
+    )
+    parser.add_argument("--users", default="1,2,4,8",
+                        help="comma-separated concurrent session counts to test in turn")
+    parser.add_argument("--fps", type=float, default=2.0,
+                        help="camera snapshots per second submitted by each session")
+    parser.add_argument("--duration", type=float, default=30.0,
+                        help="seconds each session keeps sending frames, per level")
+    parser.add_argument("--ramp", type=float, default=5.0,
+                        help="seconds over which session starts are spread")
+    parser.add_argument("--source",
+                        help="video file or image folder to replay (default: synthetic frames)")
+    parser.add_argument("--width", type=int, default=wCam)
+    parser.add_argument("--height", type=int, default=hCam)
+    parser.add_argument("--url",
+                        help="test an already running server instead of starting one")
+    parser.add_argument("--server-pid", type=int,
+                        help="pid of the --url server, for CPU / RSS sampling")
+    parser.add_argument("--app", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py"))
+    parser.add_argument("--timeout", type=float, default=30.0,
+                        help="seconds before a single frame round trip counts as timed out")
+    parser.add_argument("--latency-budget", type=float, default=1000.0,
+                        help="p95 frame latency in ms a level must stay under")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--no-images", action="store_true",
+                        help="don't download the rendered frame like a browser would")
+    parser.add_argument("--json", help="also write the report to this JSON file")
+    args = parser.parse_args()
+
+    try:
+        args.levels = [int(n) for n in args.users.split(",")]
+    except ValueError:
+        parser.error(f"--users must be comma-separated integers, got {args.users!r}")
+    if any(n < 1 for n in args.levels):
+        parser.error("--users counts must all be at least 1")
+    if args.fps <= 0:
+        parser.error("--fps must be greater than 0")
+    if args.duration <= 0:
+        parser.error("--duration must be greater than 0")
+    if args.ramp < 0:
+        parser.error("--ramp must be 0 or more")
+    if args.timeout <= 0:
+        parser.error("--timeout must be greater than 0")
+    return args
+
+
+async def main(args):
+    frames = load_frames(args.source, args.width, args.height)
+    levels = args.levels
+
+    # Every session keeps at most one HTTP request in flight; the default
+    # limit of 10 shared clients would queue them inside the harness and
+    # count that wait as server latency
+    AsyncHTTPClient.configure(None, max_clients=2 * max(levels))
+
+    server = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+    else:
+        port = free_port()
+        server = start_server(args.app, port)
+        args.server_pid = server.pid
+        base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        await wait_for_health(base_url, 60)
+        # One throwaway session so the one-off model load isn't billed to level 1.
+        # It also proves the app can be driven at all before any level runs.
+        warm_up = await CameraClient(base_url, frames, args.fps, args.timeout, False).run(1.0, 0)
+        if warm_up.errors or not warm_up.frames:
+            errors = ", ".join(f"{k}={v}" for k, v in warm_up.errors.items()) or "no frames completed"
+            raise SystemExit(f"Warm-up session failed ({errors}); is {base_url} serving app.py?")
+
+        results = []
+        for users in levels:
+            print(f"Running {users} session(s) for {args.duration:g}s ...", flush=True)
+            results.append(await run_level(args, base_url, frames, users))
+            if server is not None and server.poll() is not None:
+                print(f"Server exited with code {server.returncode}; stopping.")
+                break
+    finally:
+        if server is not None and server.poll() is None:
+            server.terminate()
+            server.wait()
+
+    print_report(results, args)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "levels": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
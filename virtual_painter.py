@@ -1,24 +1,21 @@
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from multiprocessing import Pool
+
 import cv2
 import numpy as np
 import mediapipe as mp
 
 # ------------ Config ------------
 wCam, hCam = 1280, 720
-
-cap = cv2.VideoCapture(0)
-cap.set(cv2.CAP_PROP_FRAME_WIDTH, wCam)
-cap.set(cv2.CAP_PROP_FRAME_HEIGHT, hCam)
+ref_w, ref_h = 1280, 720  # size the UI layout is designed for
 
 mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(
-    max_num_hands=1,
-    min_detection_confidence=0.7,
-    min_tracking_confidence=0.5
-)
 mp_draw = mp.solutions.drawing_utils
 
-canvas = np.zeros((hCam, wCam, 3), np.uint8)
-
 # BGR colors
 colors = [
     (255,   0, 255),   # purple
@@ -30,22 +27,52 @@ color_names = ["PURPLE", "BLUE", "GREEN", "YELLOW"]
 
 # index 0–3 = colors, 4 = eraser
 buttons_count = 5
-button_height = 80
+ref_button_height = 80
+button_height = ref_button_height
 button_width = wCam // buttons_count
 
-current_color_idx = 1
-current_color = colors[current_color_idx]
 eraser_color = (0, 0, 0)
 brush_thickness = 12
 eraser_thickness = 60
 
-prev_x, prev_y = None, None
-mode_text = "IDLE"
-is_eraser = False
+# Batch mode defaults
+chunk_frames = 60  # frames per worker task
+overlap_frames = 10  # frames re-run before each chunk so tracking warms up
+detect_width = 640  # detection input is downscaled to at most this width
+verify_tolerance_px = 8  # --verify: allowed landmark drift from the warm-up
+
+
+def create_hands():
+    return mp_hands.Hands(
+        max_num_hands=1,
+        min_detection_confidence=0.7,
+        min_tracking_confidence=0.5
+    )
+
+
+def set_frame_size(w, h):
+    # The UI helpers lay themselves out from these globals
+    global wCam, hCam, button_width, button_height
+    wCam, hCam = w, h
+    button_width = wCam // buttons_count
+    button_height = int(ref_button_height * hCam / ref_h)
+
+
+def new_state():
+    return {
+        "canvas": np.zeros((hCam, wCam, 3), np.uint8),
+        "current_color_idx": 1,
+        "is_eraser": False,
+        "prev_x": None,
+        "prev_y": None,
+    }
 
 
 # ------------ UI Drawing helpers ------------
+# The layout is designed at ref_w x ref_h and scaled to the actual frame size
 def draw_top_bar(img, active_idx, is_eraser_mode):
+    sx, sy = wCam / ref_w, hCam / ref_h
+
     # Background bar
     overlay = img.copy()
     cv2.rectangle(overlay, (0, 0), (wCam, button_height + 20), (20, 20, 20), -1)
@@ -54,9 +81,9 @@ def draw_top_bar(img, active_idx, is_eraser_mode):
     # Title
     cv2.putText(
         img, "AIR DRAW",
-        (20, 55),
-        cv2.FONT_HERSHEY_SIMPLEX, 1.3,
-        (255, 255, 255), 3, cv2.LINE_AA
+        (int(20 * sx), int(55 * sy)),
+        cv2.FONT_HERSHEY_SIMPLEX, 1.3 * sx,
+        (255, 255, 255), max(1, int(3 * sx)), cv2.LINE_AA
     )
 
     # Color / eraser buttons
@@ -78,28 +105,33 @@ def draw_top_bar(img, active_idx, is_eraser_mode):
         # active state border
         if i == active_idx or (i == 4 and is_eraser_mode):
             border_col = (255, 255, 255)
-            thickness = 4
+            thickness = max(2, int(4 * sx))
         else:
             border_col = (180, 180, 180)
-            thickness = 2
+            thickness = max(1, int(2 * sx))
 
         cv2.rectangle(img, (x1 + 5, y1), (x2 - 5, y2), border_col, thickness)
 
-        text_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
+        text_thickness = max(1, int(2 * sx))
+        text_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6 * sx, text_thickness)[0]
         text_x = x1 + (button_width - text_size[0]) // 2
-        text_y = y2 - 10
+        text_y = y2 - int(10 * sy)
         cv2.putText(
             img, label, (text_x, text_y),
-            cv2.FONT_HERSHEY_SIMPLEX, 0.6,
-            (255, 255, 255), 2, cv2.LINE_AA
+            cv2.FONT_HERSHEY_SIMPLEX, 0.6 * sx,
+            (255, 255, 255), text_thickness, cv2.LINE_AA
         )
 
 
-def draw_bottom_hud(img, mode_text, brush_size, eraser_mode):
+def draw_bottom_hud(img, mode_text, brush_size, eraser_mode, key_hints=True):
+    sx, sy = wCam / ref_w, hCam / ref_h
+    text_y = hCam - int(25 * sy)
+    thickness = max(1, int(2 * sx))
+
     overlay = img.copy()
     cv2.rectangle(
         overlay,
-        (0, hCam - 70),
+        (0, hCam - int(70 * sy)),
         (wCam, hCam),
         (0, 0, 0),
         -1
@@ -109,115 +141,113 @@ def draw_bottom_hud(img, mode_text, brush_size, eraser_mode):
     left_text = f"MODE: {mode_text}"
     cv2.putText(
         img, left_text,
-        (20, hCam - 25),
-        cv2.FONT_HERSHEY_SIMPLEX, 0.8,
-        (255, 255, 255), 2, cv2.LINE_AA
+        (int(20 * sx), text_y),
+        cv2.FONT_HERSHEY_SIMPLEX, 0.8 * sx,
+        (255, 255, 255), thickness, cv2.LINE_AA
     )
 
     mid_text = "INDEX+MIDDLE: Select | INDEX: Draw"
     cv2.putText(
         img, mid_text,
-        (wCam // 2 - 260, hCam - 25),
-        cv2.FONT_HERSHEY_SIMPLEX, 0.6,
-        (200, 200, 200), 2, cv2.LINE_AA
+        (wCam // 2 - int(260 * sx), text_y),
+        cv2.FONT_HERSHEY_SIMPLEX, 0.6 * sx,
+        (200, 200, 200), thickness, cv2.LINE_AA
     )
 
-    right_text = "C: Clear  |  Q: Quit"
-    cv2.putText(
-        img, right_text,
-        (wCam - 310, hCam - 25),
-        cv2.FONT_HERSHEY_SIMPLEX, 0.6,
-        (180, 180, 180), 2, cv2.LINE_AA
-    )
+    # Keyboard hints only mean something in the live window
+    if key_hints:
+        right_text = "C: Clear  |  Q: Quit"
+        cv2.putText(
+            img, right_text,
+            (wCam - int(310 * sx), text_y),
+            cv2.FONT_HERSHEY_SIMPLEX, 0.6 * sx,
+            (180, 180, 180), thickness, cv2.LINE_AA
+        )
 
     # brush size indicator
-    center_x = wCam - 70
-    center_y = hCam - 40
+    center_x = wCam - int(70 * sx)
+    center_y = hCam - int(40 * sy)
     size = eraser_thickness if eraser_mode else brush_size
-    cv2.circle(img, (center_x, center_y), size // 4, (255, 255, 255), 2)
+    cv2.circle(img, (center_x, center_y), max(1, int(size // 4 * sx)), (255, 255, 255), thickness)
     cv2.putText(
         img, "SIZE",
-        (center_x - 25, center_y - 25),
-        cv2.FONT_HERSHEY_PLAIN, 1.2,
+        (center_x - int(25 * sx), center_y - int(25 * sy)),
+        cv2.FONT_HERSHEY_PLAIN, 1.2 * sx,
         (220, 220, 220), 1, cv2.LINE_AA
     )
 
 
-# ------------ Main loop ------------
-while True:
-    success, frame = cap.read()
-    if not success:
-        break
-
-    frame = cv2.flip(frame, 1)
-
-    draw_top_bar(frame, current_color_idx, is_eraser)
-
+# ------------ Painting ------------
+def detect_hands(hands, frame):
     img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
     results = hands.process(img_rgb)
+    return results.multi_hand_landmarks or []
 
-    if results.multi_hand_landmarks:
-        for handLms in results.multi_hand_landmarks:
-            h, w, _ = frame.shape
-            lm_list = []
 
-            for idx, lm in enumerate(handLms.landmark):
-                cx, cy = int(lm.x * w), int(lm.y * h)
-                lm_list.append((idx, cx, cy))
+def paint_frame(frame, hand_landmarks, state, key_hints=True):
+    """Apply one frame of gestures to the stroke state and return the composited frame."""
+    canvas = state["canvas"]
+    mode_text = "NO HAND"
 
-            index_tip = lm_list[8]
-            index_pip = lm_list[6]
-            middle_tip = lm_list[12]
-            middle_pip = lm_list[10]
+    for handLms in hand_landmarks:
+        h, w, _ = frame.shape
+        lm_list = []
 
-            ix, iy = index_tip[1], index_tip[2]
+        for idx, lm in enumerate(handLms.landmark):
+            cx, cy = int(lm.x * w), int(lm.y * h)
+            lm_list.append((idx, cx, cy))
 
-            index_up = index_tip[2] < index_pip[2]
-            middle_up = middle_tip[2] < middle_pip[2]
+        index_tip = lm_list[8]
+        index_pip = lm_list[6]
+        middle_tip = lm_list[12]
+        middle_pip = lm_list[10]
 
-            # Selection mode
-            if index_up and middle_up:
-                prev_x, prev_y = None, None
-                mode_text = "SELECT"
+        ix, iy = index_tip[1], index_tip[2]
 
-                if iy < button_height + 20:
-                    idx = ix // button_width
-                    idx = int(np.clip(idx, 0, buttons_count - 1))
+        index_up = index_tip[2] < index_pip[2]
+        middle_up = middle_tip[2] < middle_pip[2]
 
-                    if idx == 4:
-                        is_eraser = True
-                        current_color_idx = -1
-                    else:
-                        is_eraser = False
-                        current_color_idx = idx
-                        current_color = colors[current_color_idx]
+        # Selection mode
+        if index_up and middle_up:
+            state["prev_x"], state["prev_y"] = None, None
+            mode_text = "SELECT"
 
-                cv2.circle(frame, (ix, iy), 14, (255, 255, 255), cv2.FILLED)
+            if iy < button_height + 20:
+                idx = ix // button_width
+                idx = int(np.clip(idx, 0, buttons_count - 1))
 
-            # Draw mode
-            elif index_up and not middle_up:
-                mode_text = "DRAW (ERASER)" if is_eraser else "DRAW"
+                if idx == 4:
+                    state["is_eraser"] = True
+                    state["current_color_idx"] = -1
+                else:
+                    state["is_eraser"] = False
+                    state["current_color_idx"] = idx
 
-                draw_color = eraser_color if is_eraser else current_color
-                thickness = eraser_thickness if is_eraser else brush_thickness
+            cv2.circle(frame, (ix, iy), 14, (255, 255, 255), cv2.FILLED)
 
-                cv2.circle(frame, (ix, iy), 14, draw_color, cv2.FILLED)
+        # Draw mode
+        elif index_up and not middle_up:
+            is_eraser = state["is_eraser"]
+            mode_text = "DRAW (ERASER)" if is_eraser else "DRAW"
 
-                if prev_x is None and prev_y is None:
-                    prev_x, prev_y = ix, iy
+            draw_color = eraser_color if is_eraser else colors[state["current_color_idx"]]
+            thickness = eraser_thickness if is_eraser else brush_thickness
 
-                cv2.line(canvas, (prev_x, prev_y), (ix, iy), draw_color, thickness)
-                prev_x, prev_y = ix, iy
+            cv2.circle(frame, (ix, iy), 14, draw_color, cv2.FILLED)
 
-            else:
-                prev_x, prev_y = None, None
-                mode_text = "IDLE"
+            if state["prev_x"] is None and state["prev_y"] is None:
+                state["prev_x"], state["prev_y"] = ix, iy
 
-            mp_draw.draw_landmarks(
-                frame, handLms, mp_hands.HAND_CONNECTIONS
-            )
-    else:
-        mode_text = "NO HAND"
+            cv2.line(canvas, (state["prev_x"], state["prev_y"]), (ix, iy), draw_color, thickness)
+            state["prev_x"], state["prev_y"] = ix, iy
+
+        else:
+            state["prev_x"], state["prev_y"] = None, None
+            mode_text = "IDLE"
+
+        mp_draw.draw_landmarks(
+            frame, handLms, mp_hands.HAND_CONNECTIONS
+        )
 
     # merge canvas and frame
     gray_canvas = cv2.cvtColor(canvas, cv2.COLOR_BGR2GRAY)
@@ -227,15 +257,262 @@ while True:
     frame_no_paint = cv2.bitwise_and(frame, inv)
     frame_with_paint = cv2.bitwise_or(frame_no_paint, canvas)
 
-    draw_bottom_hud(frame_with_paint, mode_text, brush_thickness, is_eraser)
+    draw_bottom_hud(frame_with_paint, mode_text, brush_thickness, state["is_eraser"], key_hints)
+    return frame_with_paint
 
-    cv2.imshow("AIR DRAW", frame_with_paint)
-    key = cv2.waitKey(1) & 0xFF
 
-    if key == ord('q'):
-        break
-    elif key == ord('c'):
-        canvas = np.zeros((hCam, wCam, 3), np.uint8)
+# ------------ Live webcam mode ------------
+def run_live():
+    cap = cv2.VideoCapture(0)
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, wCam)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, hCam)
 
-cap.release()
-cv2.destroyAllWindows()
+    hands = create_hands()
+    state = new_state()
+
+    while True:
+        success, frame = cap.read()
+        if not success:
+            break
+
+        frame = cv2.flip(frame, 1)
+
+        draw_top_bar(frame, state["current_color_idx"], state["is_eraser"])
+
+        frame_with_paint = paint_frame(frame, detect_hands(hands, frame), state)
+
+        cv2.imshow("AIR DRAW", frame_with_paint)
+        key = cv2.waitKey(1) & 0xFF
+
+        if key == ord('q'):
+            break
+        elif key == ord('c'):
+            state["canvas"] = np.zeros((hCam, wCam, 3), np.uint8)
+
+    cap.release()
+    cv2.destroyAllWindows()
+
+
+# ------------ Batch video mode ------------
+# Landmark detection is the expensive part and only depends on the frames, so
+# it runs in a process pool. Tracking needs consecutive frames, so each task
+# is a chunk of frames, prefixed with the tail of the previous chunk to warm
+# the tracker up. The main process decodes every frame once, sends a
+# downscaled copy to the pool, and paints and encodes the full frames in
+# order as the landmarks come back.
+_worker_hands = None
+
+
+def _init_worker():
+    global _worker_hands
+    cv2.setNumThreads(1)  # parallelism comes from the pool
+    _worker_hands = create_hands()
+
+
+def _detect_chunk(task):
+    start, warm_up, frames_rgb = task
+
+    # Drop tracking state left over from this worker's previous chunk
+    _worker_hands.reset()
+
+    landmarks = []
+    for i, img_rgb in enumerate(frames_rgb):
+        results = _worker_hands.process(img_rgb)
+        if i >= warm_up:
+            landmarks.append(list(results.multi_hand_landmarks or []))
+    return start, landmarks
+
+
+def detection_input(frame):
+    # Landmarks are normalized, so detection doesn't need the full resolution
+    h, w = frame.shape[:2]
+    if w > detect_width:
+        frame = cv2.resize(frame, (detect_width, h * detect_width // w), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+
+def read_chunks(cap, chunk_size, overlap, mirror):
+    # Yields (frames, task) until the video ends, whatever its reported length
+    start = 0
+    tail = []
+    while True:
+        frames, inputs = [], []
+        while len(frames) < chunk_size:
+            success, frame = cap.read()
+            if not success:
+                break
+            if mirror:
+                frame = cv2.flip(frame, 1)
+            frames.append(frame)
+            inputs.append(detection_input(frame))
+        if not frames:
+            return
+        yield frames, (start, len(tail), tail + inputs)
+        tail = inputs[max(0, len(inputs) - overlap):] if overlap else []
+        start += len(frames)
+
+
+def output_path_for(path, output_dir):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(output_dir, f"{stem}_airdraw.mp4")
+
+
+def landmark_offset(expected, found, w, h):
+    # Largest pixel distance between matching landmarks; None if the hands differ
+    if len(expected) != len(found):
+        return None
+    offset = 0.0
+    for a, b in zip(expected, found):
+        for la, lb in zip(a.landmark, b.landmark):
+            offset = max(offset, np.hypot((la.x - lb.x) * w, (la.y - lb.y) * h))
+    return offset
+
+
+def report_progress(name, done, total, started):
+    elapsed = time.perf_counter() - started
+    fps = done / elapsed if elapsed > 0 else 0.0
+    of_total = f"/{total}" if total > 0 else ""
+    sys.stdout.write(f"\r{name}: {done}{of_total} frames  {fps:.1f} fps")
+    sys.stdout.flush()
+
+
+def run_batch(inputs, output_dir, workers, chunk_size, overlap, mirror=False, verify=False):
+    outputs = [output_path_for(path, output_dir) for path in inputs]
+    duplicates = sorted({out for out in outputs if outputs.count(out) > 1})
+    if duplicates:
+        raise SystemExit(f"Several inputs would be written to {', '.join(duplicates)}; "
+                         f"rename them or process them separately")
+    for path in inputs:
+        cap = cv2.VideoCapture(path)
+        if not cap.isOpened():
+            raise SystemExit(f"Cannot open video: {path}")
+        cap.release()
+    os.makedirs(output_dir, exist_ok=True)
+
+    summary = []
+    verify_failures = []
+    waited = 0.0
+    started = time.perf_counter()
+    with Pool(workers, initializer=_init_worker) as pool:
+        for path, out_path in zip(inputs, outputs):
+            video_started = time.perf_counter()
+            name = os.path.basename(path)
+            cap = cv2.VideoCapture(path)
+            total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))  # only for progress; may be an estimate
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+            w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+            set_frame_size(w, h)
+            state = new_state()
+            writer = cv2.VideoWriter(out_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h))
+            if not writer.isOpened():
+                raise SystemExit(f"Cannot write video: {out_path}")
+            done = 0
+
+            # --verify re-runs detection over the whole video in one piece, here
+            verify_hands = create_hands() if verify else None
+            worst = (0.0, None)
+            hand_mismatches = 0
+
+            # Keep a bounded number of chunks in flight: enough to keep every
+            # worker busy, without holding the whole video in memory
+            chunks = read_chunks(cap, chunk_size, overlap, mirror)
+            pending = deque()
+
+            def submit():
+                item = next(chunks, None)
+                if item is not None:
+                    frames, task = item
+                    pending.append((frames, task, pool.apply_async(_detect_chunk, (task,))))
+
+            for _ in range(workers + 1):
+                submit()
+
+            while pending:
+                frames, task, result = pending.popleft()
+                submit()
+                wait_started = time.perf_counter()
+                chunk_start, landmarks = result.get()
+                waited += time.perf_counter() - wait_started
+                if chunk_start != done or len(landmarks) != len(frames):
+                    raise SystemExit(f"{name}: landmarks for frame {chunk_start} don't match frame {done}")
+
+                for k, (frame, found) in enumerate(zip(frames, landmarks)):
+                    if verify_hands is not None:
+                        results = verify_hands.process(task[2][task[1] + k])
+                        offset = landmark_offset(results.multi_hand_landmarks or [], found, w, h)
+                        if offset is None:
+                            hand_mismatches += 1
+                        elif offset > worst[0]:
+                            worst = (offset, done)
+
+                    draw_top_bar(frame, state["current_color_idx"], state["is_eraser"])
+                    writer.write(paint_frame(frame, found, state, key_hints=False))
+                    done += 1
+                report_progress(name, done, total, video_started)
+
+            cap.release()
+            writer.release()
+            print()
+
+            if verify_hands is not None:
+                print(f"{name}: verify: {hand_mismatches} frames with a different hand count, "
+                      f"largest landmark offset {worst[0]:.1f}px"
+                      + (f" at frame {worst[1]}" if worst[1] is not None else ""))
+                if hand_mismatches or worst[0] > verify_tolerance_px:
+                    verify_failures.append(name)
+
+            summary.append((name, done, time.perf_counter() - video_started, out_path))
+
+    elapsed = time.perf_counter() - started
+    frames = sum(s[1] for s in summary)
+    busy = elapsed - waited
+    print()
+    for name, done, secs, out_path in summary:
+        print(f"{name}: {done} frames in {secs:.1f}s ({done / max(secs, 1e-9):.1f} fps) -> {out_path}")
+    print(f"Total: {frames} frames in {elapsed:.1f}s "
+          f"({frames / max(elapsed, 1e-9):.1f} fps, {workers} workers)")
+    print(f"Main process: {busy:.1f}s decoding, painting and encoding "
+          f"(ceiling {frames / max(busy, 1e-9):.1f} fps), {waited:.1f}s waiting on detection")
+
+    if verify_failures:
+        raise SystemExit(f"Chunked landmarks differ from a single pass for: {', '.join(verify_failures)}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Air drawing with hand gestures. Runs on the webcam unless --input is given."
+    )
+    parser.add_argument("--input", nargs="+",
+                        help="video files to process offline instead of using the webcam")
+    parser.add_argument("--output-dir", default=".",
+                        help="where <name>_airdraw.mp4 files are written (batch mode)")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) - 1),
+                        help="landmark detection processes (batch mode)")
+    parser.add_argument("--chunk-size", type=int, default=chunk_frames,
+                        help="frames per detection task (batch mode)")
+    parser.add_argument("--overlap", type=int, default=overlap_frames,
+                        help="warm-up frames re-run before each chunk, up to --chunk-size (batch mode)")
+    parser.add_argument("--mirror", action="store_true",
+                        help="flip the footage like the webcam preview (batch mode)")
+    parser.add_argument("--verify", action="store_true",
+                        help="also detect in a single pass and compare with the chunked landmarks")
+    args = parser.parse_args()
+
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    if args.overlap < 0:
+        parser.error("--overlap must be 0 or more")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.input:
+        run_batch(args.input, args.output_dir, args.workers, args.chunk_size, args.overlap,
+                  args.mirror, args.verify)
+    else:
+        run_live()